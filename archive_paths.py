@@ -3,13 +3,23 @@ from __future__ import annotations
 import os
 import pathlib
 import tempfile
-import shutil
-from io import FileIO, BytesIO, StringIO
+from io import BytesIO, TextIOWrapper
 from collections.abc import Sequence
 from typing import Optional, Union, IO, Any
 
 import paths
 
+_py7zr = None
+
+
+def _get_py7zr():
+    """Returns py7zr, importing it on first use so it is only needed to open 7z archives."""
+    global _py7zr
+    if _py7zr is None:
+        import py7zr
+        _py7zr = py7zr
+    return _py7zr
+
 
 # TODO: Implement unzip or lzma based virtual paths, and one based on the 7z archive (much faster
 #  and compatible with basically every archive format)
@@ -18,12 +28,14 @@ class ArchivePath(paths.VirtualDirPath):
                  is_anchor: bool = True) -> None:
         super().__init__(name=name, parent=parent, backend='py7zr', path_type=path_type)
         self.is_anchor = is_anchor
-        self.anchor = self.get_path() if self.is_anchor else None
-        self.anchor = self.get_anchor()
+        # Resolved once here, so get_anchor() and get_anchor_obj() never have to walk up the tree
+        self._anchor_obj = self if self.is_anchor else parent.get_anchor_obj()
+        self.anchor = self.get_path() if self.is_anchor else parent.get_anchor()
         self.child_data = {}
 
     def set_is_anchor(self, is_anchor: bool) -> None:
         self.is_anchor = is_anchor
+        self._anchor_obj = self if is_anchor else self.get_parent().get_anchor_obj()
 
     def set_anchor(self, anchor: str) -> None:
         self.anchor = anchor
@@ -39,76 +51,205 @@ class ArchivePath(paths.VirtualDirPath):
         else:
             return self.get_parent().get_anchor()
 
+    def get_anchor_obj(self) -> ArchivePath:
+        return self._anchor_obj
+
 
 class Py7zrArchivePath(ArchivePath):
+    # Solid blocks with at most this many uncompressed bytes are decompressed in full the first time
+    # one of their entries is read
+    readall_max_size = 256 * 1024 * 1024
+
     def __init__(self, name: str, parent: paths.DirPath, backend: str = 'py7zr', path_type: str = '7z',
                  is_anchor: bool = True) -> None:
         super().__init__(name=name, parent=parent, backend='py7zr', path_type=path_type, is_anchor=is_anchor)
+        self._tempfile_cache: dict[str, str] = {}
+        if is_anchor:
+            self.init_archive_state()
+
+    def init_archive_state(self) -> None:
+        """Sets up the state kept for the whole archive. Only the anchor holds this."""
         self.archive_file = None
+        self._index: dict[str, dict[str, dict]] = {}
+        self._block_entries: dict[int, list[str]] = {}
+        self._block_sizes: dict[int, int] = {}
+        self._extracted: dict[str, bytes] = {}
+        self._needs_reset = False
 
-    def get_archive_file(self) -> 'py7zr.SevenZipFile':
-        if self.archive_file is not None:
-            return self.archive_file
-        elif not self.get_is_anchor():
-            return self.parent.get_archive_file()
+    def set_is_anchor(self, is_anchor: bool) -> None:
+        super().set_is_anchor(is_anchor)
+        if is_anchor:
+            self.init_archive_state()
+
+    def get_archive_file(self) -> Optional['py7zr.SevenZipFile']:
+        """Returns the archive's SevenZipFile, which is opened on first use and only held by the anchor."""
+        anchor = self._anchor_obj
+        if anchor.archive_file is None:
+            anchor.archive_file = anchor.open_archive_file()
+            if anchor.archive_file is not None:
+                anchor.index_children(anchor.archive_file.header.files_info.files)
+                anchor.get_context().add_archive(anchor)
+        return anchor.archive_file
+
+    def close_archive(self) -> None:
+        """Closes the archive's SevenZipFile and releases any entries held in memory."""
+        anchor = self._anchor_obj
+        if anchor.archive_file is not None:
+            anchor.archive_file.close()
+            anchor.archive_file = None
+        anchor._extracted = {}
+        anchor._needs_reset = False
+
+    def open_archive_file(self) -> Optional['py7zr.SevenZipFile']:
+        py7zr = _get_py7zr()
+        if self.get_parent().get_backend() == 'fs':
+            file = self.get_path()
         else:
-            import py7zr
-            if self.get_parent().get_backend() == 'fs':
-                file = self.get_path()
-            else:
-                file = self.get_parent().v_open(self.get_name(), temp=False, text=False)
+            file = self.get_parent().v_open(self.get_name(), temp=False, text=False)
+        try:
             try:
-                try:
-                    return py7zr.SevenZipFile(file, 'r')
-                except py7zr.exceptions.PasswordRequired:
-                    import lzma
-                    for i in range(3):
-                        try:
-                            password = self.get_context().password(f'{self.get_name()} requires a password: ')
-                            return py7zr.SevenZipFile(file, mode='r', password=password)
-                        except lzma.LZMAError:
-                            self.get_context().error('Incorrect password.')
-            except py7zr.exceptions.ArchiveError as e:
-                self.get_context().error(f'Decompression error: {str(e)}')
-
-    def filter_children(self, files: list[dict]) -> dict[str, dict]:
-        to_return = {}
+                return py7zr.SevenZipFile(file, 'r')
+            except py7zr.exceptions.PasswordRequired:
+                import lzma
+                for i in range(3):
+                    try:
+                        password = self.get_context().password(f'{self.get_name()} requires a password: ')
+                        return py7zr.SevenZipFile(file, mode='r', password=password)
+                    except lzma.LZMAError:
+                        self.get_context().error('Incorrect password.')
+        except py7zr.exceptions.ArchiveError as e:
+            self.get_context().error(f'Decompression error: {str(e)}')
+
+    def index_children(self, files: list[dict]) -> None:
+        """Builds an index of the archive's entries, keyed by the directory containing them.
+
+        This is done once, when the archive is opened, so that listing any directory inside the
+        archive is a single lookup instead of a scan over every entry. The file entries of each
+        solid block, and their total size, are collected at the same time.
+        """
+        index = self._index = {}
+        block_entries = self._block_entries = {}
+        block_sizes = self._block_sizes = {}
         for file in files:
-            # print(file['filename'], os.path.dirname(os.path.join(self.get_anchor(), file['filename'])))
-            if os.path.normpath(self.get_path()) == \
-                    os.path.normpath(os.path.dirname(os.path.join(self.get_anchor(), file['filename']))) and \
-                    os.path.basename(file['filename']) not in self.children:
-                # print('adding')
-                to_return[os.path.basename(file['filename'])] = file
-        return to_return
+            folder = file['folder']
+            if folder is not None and folder.solid:
+                block_entries.setdefault(id(folder), []).append(file['filename'])
+                block_sizes[id(folder)] = block_sizes.get(id(folder), 0) + (file.get('uncompressed') or 0)
+            parent_dir, name = os.path.split(file['filename'])
+            index.setdefault(os.path.normpath(parent_dir), {})[name] = file
+
+    def get_archive_dir(self) -> str:
+        """Returns the path of this directory relative to the anchor, as used to key the index."""
+        return os.path.normpath(os.path.relpath(self.get_path(), self.anchor))
+
+    def get_entry_info(self, extract_path: str) -> dict:
+        """Returns py7zr's file info for an entry, given its path relative to the anchor."""
+        self.get_archive_file()
+        parent_dir, name = os.path.split(extract_path)
+        return self._anchor_obj._index[os.path.normpath(parent_dir)][name]
 
     def find_children(self) -> None:
-        if self.archive_file is None:
-            self.archive_file = self.get_archive_file()
-        if self.archive_file is not None:
-            child_info = self.filter_children(self.archive_file.header.files_info.files)
-            for item in child_info:
-                if child_info[item]['folder'] is None:
-                    self.get_context().add_path(name=item, is_dir=True, path_type='7z', backend='py7zr',
-                                                dest=self, init_kwargs={'is_anchor': False})
+        if self.get_archive_file() is not None:
+            children = self.children
+            add_path = self.get_context().add_path
+            for name, info in self._anchor_obj._index.get(self.get_archive_dir(), {}).items():
+                if name in children:
+                    continue
+                if info['folder'] is None:
+                    add_path(name=name, is_dir=True, path_type='7z', backend='py7zr', dest=self,
+                             init_kwargs={'is_anchor': False}, basename=name)
                 else:
-                    self.get_context().add_path(name=item, is_dir=False, backend='py7zr', dest=self)
+                    add_path(name=name, is_dir=False, backend='py7zr', dest=self, basename=name)
+
+    def read_with_block(self, extract_path: str) -> bool:
+        """Returns whether an entry is read along with the rest of its solid block, and kept in memory."""
+        anchor = self._anchor_obj
+        if extract_path in anchor._extracted:
+            return True
+        folder = anchor.get_entry_info(extract_path)['folder']
+        return folder.solid and anchor._block_sizes[id(folder)] <= anchor.readall_max_size
+
+    def read_entry(self, extract_path: str) -> bytes:
+        """Returns the data of an entry in this archive.
+
+        Inside a solid block, every read() decompresses from the start of the block, so blocks
+        small enough to be held in memory are decompressed once, in a single read() of every file
+        entry in them, and served from that afterwards. Entries of larger solid blocks, or of
+        non-solid folders, which py7zr skips over unless asked for, are read on their own.
+        """
+        anchor = self._anchor_obj
+        if anchor.read_with_block(extract_path):
+            if extract_path not in anchor._extracted:
+                folder = anchor.get_entry_info(extract_path)['folder']
+                anchor._extracted.update(anchor.read_entries(anchor._block_entries[id(folder)]))
+            return anchor._extracted[extract_path]
+        return anchor.read_entries([extract_path])[extract_path]
+
+    def read_entries(self, extract_paths: list[str]) -> dict[str, bytes]:
+        """Reads several entries of this archive in a single pass.
+
+        py7zr always decompresses in archive order, so a single read() of every entry needed is
+        much cheaper than one read() per entry.
+        """
+        archive_file = self.get_archive_file()
+        self._anchor_obj.prepare_archive_file()
+        return {name: data.getvalue() for name, data in archive_file.read(extract_paths).items()}
+
+    def prepare_archive_file(self) -> None:
+        """Rewinds the archive before a read or extract, if an earlier one has used it.
+
+        Resetting right before the next access rather than right after each one means the archive
+        isn't rewound for nothing after the last read, e.g. once its entries are held in memory.
+        """
+        anchor = self._anchor_obj
+        if anchor._needs_reset:
+            anchor.get_archive_file().reset()
+        anchor._needs_reset = True
+
+    def extract_entry(self, extract_path: str, dest: str) -> None:
+        """Extracts an entry in this archive straight to the file at dest."""
+        archive_file = self.get_archive_file()
+        self._anchor_obj.prepare_archive_file()
+        with tempfile.TemporaryDirectory() as tempdir:
+            archive_file.extract(path=tempdir, targets=[extract_path])
+            os.replace(os.path.join(tempdir, extract_path), dest)
+
+    def get_extract_path(self, path: str) -> str:
+        return pathlib.Path(os.path.relpath(os.path.join(self.get_path(), path), self.anchor)).as_posix()
 
     def v_open(self, path: str, temp: bool = False, text: bool = False) -> Union[str, IO]:
-        if path not in self.child_data:
-            extract_path = pathlib.Path(
-                os.path.relpath(os.path.join(self.get_path(), path), self.get_anchor())).as_posix()
-            self.child_data[path] = self.archive_file.read([extract_path])[extract_path].read()
-            self.archive_file.reset()
+        anchor = self._anchor_obj
+        child_data = self.child_data
         if temp:
+            # Tempfiles are only removed on cleanup, so one made by an earlier call can be reused
+            if path in self._tempfile_cache and os.path.exists(self._tempfile_cache[path]):
+                return self._tempfile_cache[path]
             file = tempfile.mkstemp(suffix=os.path.splitext(path)[1], text=False)
             self.get_context().add_tempfile(file[1])
-            with FileIO(file[0], 'wb') as f:
-                data = BytesIO(self.child_data[path])
-                shutil.copyfileobj(data, f)
+            extract_path = self.get_extract_path(path)
+            if path not in child_data and not anchor.read_with_block(extract_path):
+                # Entries that aren't held in memory with their solid block are written to disk by the
+                # decompressor, so a viewer can be launched without reading the entry into memory
+                os.close(file[0])
+                anchor.extract_entry(extract_path, file[1])
+                self._tempfile_cache[path] = file[1]
+                return file[1]
+            if path not in child_data:
+                child_data[path] = anchor.read_entry(extract_path)
+            try:
+                data = memoryview(child_data[path])
+                while data:
+                    data = data[os.write(file[0], data):]
+            finally:
+                os.close(file[0])
+            self._tempfile_cache[path] = file[1]
             return file[1]
         else:
+            if path not in child_data:
+                child_data[path] = anchor.read_entry(self.get_extract_path(path))
+            # BytesIO shares the buffer of the bytes object it's given until it's written to
             if text:
-                return StringIO(str(self.child_data[path], encoding='utf-8'))
+                # newline='' keeps line endings as they are in the archive, as StringIO did
+                return TextIOWrapper(BytesIO(child_data[path]), encoding='utf-8', newline='')
             else:
-                return BytesIO(self.child_data[path])
+                return BytesIO(child_data[path])
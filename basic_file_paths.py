@@ -6,6 +6,18 @@ from typing import Optional
 import paths
 from errors import NonexistentMappingError, UnsupportedOperationWarning
 
+_Image = None
+
+
+def _get_image():
+    """Returns PIL.Image, importing it on first use so Pillow is only needed to open images."""
+    global _Image
+    if _Image is None:
+        from PIL import Image
+        _Image = Image
+    return _Image
+
+
 class ImageFile(paths.FilePath):
     def __init__(self, name: str, parent: Optional[paths.DirPath] = None, backend: str = 'fs',
                  path_type: str = 'image') -> None:
@@ -35,7 +47,7 @@ class ImageFile(paths.FilePath):
     def load(self) -> None:
         if self.image is not None:
             return
-        from PIL import Image
+        Image = _get_image()
         if self.backend == 'fs':
             self.image = Image.open(self.get_path())
         else:
@@ -80,9 +92,12 @@ class GenericFile(paths.FilePath):
                 file = self.get_parent().v_open(self.get_name(), temp=True, text=False)
             args = [self.programs[self.get_type()]] if self.programs[self.get_type()] else []
             args.append(file)
-            subprocess.run(args)
+            process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+            if self.get_backend() != 'fs':
+                self.get_context().add_process(process)
         else:
-            warnings.warn(UnsupportedOperationWarning(f'Opening {self.get_type()} files is not currently supported.'))
+            warnings.warn(f'Opening {self.get_type()} files is not currently supported.', UnsupportedOperationWarning)
 
 
 class TermuxGenericFile(paths.FilePath):
@@ -102,4 +117,7 @@ class TermuxGenericFile(paths.FilePath):
             file = self.get_path()
         else:
             file = self.get_parent().v_open(self.get_name(), temp=True, text=False)
-        subprocess.run(['termux-open', file])
+        process = subprocess.Popen(['termux-open', file], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        if self.get_backend() != 'fs':
+            self.get_context().add_process(process)
@@ -5,9 +5,20 @@ import random
 import warnings
 from typing import Callable
 
+from prompt_toolkit import print_formatted_text, ANSI
+
 import paths
+import archive_paths
 from errors import UnexpectedSituationWarning
 
+# ls colors for file types, directories are handled separately
+_TYPE_COLORS = {
+    'image': '\x1b[35m',
+    'pdf': '\x1b[33m',
+    'video': '\x1b[35;1m',
+    'generic': '\x1b[33;1m',
+}
+
 class CommandClass:
     @classmethod
     def get_commands(cls) -> dict[str, Callable]:
@@ -40,36 +51,23 @@ class BaseCommands(CommandClass):
 
     @staticmethod
     def get_path_colors(path):
-        import basic_file_paths
-        import archive_paths
-        to_return = ''
-        if isinstance(path, archive_paths.ArchivePath) and path.get_is_anchor():
-            to_return += '\x1b[31;1m'
-        elif isinstance(path, paths.DirPath):
-            to_return += '\x1b[34;1m'
-        elif path.get_type() == 'image':
-            to_return += '\x1b[35m'
-        elif path.get_type() == 'pdf':
-            to_return += '\x1b[33m'
-        elif path.get_type() == 'video':
-            to_return += '\x1b[35;1m'
-        elif path.get_type() == 'generic':
-            to_return += '\x1b[33;1m'
-        return to_return
+        if isinstance(path, paths.DirPath):
+            if isinstance(path, archive_paths.ArchivePath) and path.get_is_anchor():
+                return '\x1b[31;1m'
+            return '\x1b[34;1m'
+        return _TYPE_COLORS.get(path.get_type(), '')
 
     @classmethod
     def ls(cls, context, args: list[str]) -> None:
         """Lists the contents of the current directory."""
-        contents = list(context.current.keys())
+        color = context.options['color'] and context.isatty
         strs = []
-        for item in contents:
-            strs.append(f"'{item}'" if ' ' in item else item)
-        if context.options['color']:
-            for i in range(len(strs)):
-                code = cls.get_path_colors(context.current[contents[i]])
-                if code:
-                    strs[i] = code + strs[i] + '\x1b[0m'
-            from prompt_toolkit import print_formatted_text, ANSI
+        for name, path in context.current.items():
+            if ' ' in name:
+                name = f"'{name}'"
+            code = cls.get_path_colors(path) if color else ''
+            strs.append(f'{code}{name}\x1b[0m' if code else name)
+        if color:
             print_formatted_text(ANSI(' '.join(strs)))
         else:
             print(' '.join(strs))
@@ -119,8 +117,9 @@ class BaseCommands(CommandClass):
             elif isinstance(context.current[name], paths.FilePath):
                 context.current[name].open()
             else:
-                warnings.warn(UnexpectedSituationWarning(
-                    'The open() command was called on a Path that was not a FilePath or a DirPath.'))
+                warnings.warn(
+                    'The open() command was called on a Path that was not a FilePath or a DirPath.',
+                    UnexpectedSituationWarning)
         else:
             context.error('The given path was not found.')
 
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import os
 import argparse
-import glob
+import subprocess
+import sys
 from getpass import getpass
 import warnings
 from typing import Union, Callable, Optional, Any
@@ -28,6 +29,8 @@ class Terminal:
         }
         if options is not None:
             self.options.update(options)
+        # Colors are only useful when the output isn't piped or redirected
+        self.isatty = sys.stdout.isatty()
         self.start = paths.DirPath(name=os.path.abspath(start_path), context=[self])
         self.current = self.start
         self.file_map = {
@@ -41,6 +44,7 @@ class Terminal:
         }
         if dir_map is not None:
             self.dir_map.update(dir_map)
+        self.index_types()
         self.add_all_children()
         self.commands = {}
         self.initialize_command_class(BaseCommands)
@@ -51,10 +55,12 @@ class Terminal:
                 if isinstance(item, type):
                     self.initialize_command_class(item)
                 else:
-                    self.commands[item.__name__] = item
+                    self.initialize_commands({item.__name__: item})
         self.running = None
         self.session = None
         self.tempfiles = []
+        self.processes = []
+        self.archives = []
 
     def set_current(self, path: str) -> None:
         self.current = path
@@ -67,17 +73,19 @@ class Terminal:
 
     def initialize_command_class(self, command_class: type[CommandClass]) -> None:
         self.commands.update(command_class.get_commands())
+        self._static_completions = [*self.commands, 'exit']
 
     def initialize_commands(self, commands) -> None:
         # I'm not f**king writing that type hinting again. It takes a list or a dict of command functions.
         for name in commands:
             self.commands[name] = commands[name]
+        self._static_completions = [*self.commands, 'exit']
 
     def execute_command(self, command_str: str) -> None:
         args = command_str.split()
         if len(args) == 0:
             pass
-        elif args[0] not in self.commands.keys():
+        elif args[0] not in self.commands:
             self.error('Invalid command.')
         else:
             self.commands[args[0]](self, args[1:])
@@ -85,19 +93,26 @@ class Terminal:
     def error(self, message: Any) -> None:
         print(message)
 
+    def index_types(self) -> None:
+        """Builds the extension lookups used by get_path_type().
+
+        This must be called again after file_map or dir_map is changed. If an extension is listed
+        under more than one type, the type that comes last in the map is used.
+        """
+        self._file_ext_index = {ext: path_type for path_type, (_, exts) in self.file_map.items() for ext in exts}
+        self._dir_ext_index = {ext: path_type for path_type, (_, exts) in self.dir_map.items() for ext in exts}
+
     def get_path_type(self, path: str, is_dir: bool = True, default_type: str = 'text',
                       default_dir_type: str = 'dir') -> str:
-        path_type = default_dir_type if is_dir else default_type
-        mapping = self.dir_map if is_dir else self.file_map
-        ext = os.path.splitext(path)[1]
-        for cand_type in mapping:
-            if ext in mapping[cand_type][1]:
-                path_type = cand_type
-        return path_type
+        if is_dir:
+            return self._dir_ext_index.get(os.path.splitext(path)[1], default_dir_type)
+        else:
+            return self._file_ext_index.get(os.path.splitext(path)[1], default_type)
 
     def add_path(self, name: str, is_dir: bool = True, path_type: Optional[str] = None, default_type: str = 'text',
                  default_dir_type: str = 'dir', parent: bool = False, backend: str = 'fs',
-                 dest: Optional[paths.DirPath] = None, init_kwargs: Optional[dict] = None) -> None:
+                 dest: Optional[paths.DirPath] = None, init_kwargs: Optional[dict] = None,
+                 basename: Optional[str] = None) -> None:
         """Adds the specified path to the tree as a new Path object.
 
         :param name: the name of the new Path.
@@ -111,6 +126,8 @@ class Terminal:
         :param backend: the backend type for the new Path object.
         :param dest: if specified, add the path to the given path instead of self.current.
         :param init_kwargs: if specified, pass these kwargs to the new Path's constructor.
+        :param basename: the basename of name, if the caller already knows it. This saves
+                         recomputing it for names that have no path components.
         """
         if dest is None:
             dest = self.current
@@ -118,25 +135,42 @@ class Terminal:
             path_type = self.get_path_type(name, is_dir, default_type, default_dir_type)
         if init_kwargs is None:
             init_kwargs = {}
-        mapping = self.dir_map if is_dir else self.file_map
-        if parent and backend == 'fs':
-            dest['..'] = mapping[path_type][0](name=name, backend=backend, children=dest, path_type=path_type,
-                                               **init_kwargs)
-        elif parent:
-            warnings.warn(UnsupportedOperationWarning(
-                'Adding parent paths outside of the filesystem is unsupported at this time.'))
+        path_class = (self.dir_map if is_dir else self.file_map)[path_type][0]
+        if not parent:
+            if basename is None:
+                basename = os.path.basename(name)
+            # Filesystem paths keep the full name, so they can resolve their own path
+            dest[basename] = path_class(name=name if backend == 'fs' else basename, parent=dest, backend=backend,
+                                        path_type=path_type, **init_kwargs)
         elif backend == 'fs':
-            dest[os.path.basename(name)] = mapping[path_type][0](name=name, parent=dest, backend=backend,
-                                                                 path_type=path_type, **init_kwargs)
+            dest['..'] = path_class(name=name, backend=backend, children=dest, path_type=path_type, **init_kwargs)
         else:
-            dest[os.path.basename(name)] = mapping[path_type][0](name=os.path.basename(name), parent=dest,
-                                                                 backend=backend, path_type=path_type, **init_kwargs)
+            warnings.warn(
+                'Adding parent paths outside of the filesystem is unsupported at this time.',
+                UnsupportedOperationWarning)
 
     def add_all_children(self) -> None:
         if self.current.get_backend() == 'fs':
-            for path in glob.glob(os.path.join(self.current.get_path(), '*')):
-                if os.path.basename(path) not in self.current:
-                    self.add_path(name=path, is_dir=os.path.isdir(path))
+            # This is the add_path() fs case inlined, as it runs for every entry in the directory
+            dest = self.current
+            try:
+                with os.scandir(dest.get_path()) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        # Hidden (dot) entries are not listed
+                        if name.startswith('.') or name in dest:
+                            continue
+                        if entry.is_dir():
+                            path_type = self._dir_ext_index.get(os.path.splitext(name)[1], 'dir')
+                            path_class = self.dir_map[path_type][0]
+                        else:
+                            path_type = self._file_ext_index.get(os.path.splitext(name)[1], 'text')
+                            path_class = self.file_map[path_type][0]
+                        dest[name] = path_class(name=entry.path, parent=dest, backend='fs', path_type=path_type)
+            except OSError:
+                # Directories that can't be read, or were removed since they were listed, are treated
+                # as empty, as glob() does
+                pass
         else:
             self.current.find_children()
 
@@ -147,12 +181,25 @@ class Terminal:
             return getpass(prompt)
 
     def cleanup(self) -> None:
+        # Viewers may still have tempfiles open
+        for process in self.processes:
+            process.wait()
         for file in self.tempfiles:
             os.remove(file)
+        for archive in self.archives:
+            archive.close_archive()
 
     def add_tempfile(self, name: str) -> None:
         self.tempfiles.append(name)
 
+    def add_process(self, process: subprocess.Popen) -> None:
+        """Registers a running viewer program, which cleanup() will wait on before removing tempfiles."""
+        self.processes.append(process)
+
+    def add_archive(self, archive: archive_paths.Py7zrArchivePath) -> None:
+        """Registers an opened archive, which cleanup() will close."""
+        self.archives.append(archive)
+
     def nb_shell(self) -> None:
         self.session = PromptSession()
         self.running = 'nb_shell'
@@ -182,8 +229,7 @@ class Terminal:
         return prompt
 
     def nb_completer(self):
-        options = list(self.commands.keys()) + ['exit'] + list(self.current.keys())
-        return WordCompleter(options)
+        return WordCompleter(self._static_completions + list(self.current))
 
 
 if __name__ == '__main__':
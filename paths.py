@@ -13,12 +13,15 @@ cleanly) if a dependency is missing, but it's not required.
 from __future__ import annotations
 
 import os
+import sys
 import warnings
-from collections.abc import MutableMapping, Sequence
-from typing import Union, Optional, IO
+from collections import ChainMap
+from collections.abc import Sequence
+from typing import Union, Optional, IO, Any, Iterator, KeysView, ValuesView, ItemsView, cast
 
 from errors import IncorrectFileTypeWarning, NonexistentMappingError, UnexpectedSituationWarning
 
+
 class Path:
     """Represents the common attributes and methods to represent a path in the browser.
 
@@ -28,6 +31,8 @@ class Path:
     This class is meant to be extended by its subclasses, and should not be used on its own.
     """
 
+    __slots__ = ('name', 'parent', 'backend', 'path_type', 'path', '_context', '_resolved_path')
+
     def __init__(self, name: str, parent: Optional[DirPath] = None, backend: str = 'fs',
                  path_type: str = 'text', context: Optional[list] = None) -> None:
         """Initializes a new Path object.
@@ -38,37 +43,57 @@ class Path:
                         virtual file handler class.
         :param path_type: the type path the new object will represent.
         """
-        self.name = os.path.basename(name)
-        self.parent = parent
-        self.backend = backend
-        self.path_type = path_type
-        self.path = None if self.name == name else os.path.abspath(name)
-        self.path = self.get_path()
-        self.context = context
-        self.set_context(context)
+        self._resolved_path: Optional[str] = None
+        self.path: Optional[str]
+        if os.sep in name or (os.altsep and os.altsep in name):
+            basename = os.path.basename(name)
+            # Only set if a full path was given, otherwise get_path() resolves it when first needed
+            self.path = os.path.abspath(name)
+        else:
+            # Names without a separator, like those of virtual paths, are basenames already
+            basename = name
+            self.path = None
+        # Backends, types and short names repeat across the tree, so they share one interned string each
+        self.name = sys.intern(basename) if len(basename) < 20 else basename
+        self.parent: Optional[DirPath] = parent
+        self.backend = sys.intern(backend)
+        self.path_type = sys.intern(path_type)
+        # If no context is given, it's inherited from the parent when first accessed
+        self._context = context
+
+    @property
+    def context(self) -> Optional[list]:
+        if self._context is None and self.parent is not None:
+            self._context = self.parent.context
+        return self._context
+
+    @context.setter
+    def context(self, context: Optional[list]) -> None:
+        self._context = context
 
     def set_name(self, name: str) -> None:
         self.name = name
+        self.clear_path_cache()
 
-    def set_parent(self, parent: DirPath):
+    def set_parent(self, parent: Optional[DirPath]) -> None:
         self.parent = parent
+        self.clear_path_cache()
 
     def set_type(self, path_type: str) -> None:
-        self.path_type = path_type
+        self.path_type = sys.intern(path_type)
 
     def set_context(self, context: Optional[list] = None) -> None:
-        if context is None and self.context is None:
-            if self.parent is not None:
-                self.context = self.parent.context
-        elif self.context is None:
-            self.context = context
-        else:
+        if self.context is not None and context is not None:
             self.context[0] = context[0]
+        elif context is not None:
+            self.context = context
+        elif self.context is None and self.parent is not None:
+            self.context = self.parent.context
 
     def get_name(self) -> str:
         return self.name
 
-    def get_parent(self) -> DirPath:
+    def get_parent(self) -> Optional[DirPath]:
         return self.parent
 
     def get_backend(self) -> str:
@@ -77,52 +102,85 @@ class Path:
     def get_type(self) -> str:
         return self.path_type
 
-    def get_context(self):
+    def get_context(self) -> Any:
         if self.context is None:
             return self.context
         else:
             return self.context[0]
 
     def get_path(self) -> str:
+        if self._resolved_path is not None:
+            # This has been resolved before
+            return self._resolved_path
+        # Walk up to the closest Path that knows its own path, then join all the names below it in
+        # one go, rather than joining once per level of recursion
+        names: list[str] = []
+        node: Path = self
+        while node._resolved_path is None and node.path is None and node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        root = node._resolved_path
+        if root is None:
+            root = node._resolved_path = node.resolve_root_path()
+        path = self._resolved_path = os.path.join(root, *reversed(names))
+        return path
+
+    def resolve_root_path(self) -> str:
+        """Returns the path of a Path that can't be generated from its parent's path.
+
+        This is the case if a full path was given, or if there is no parent.
+        """
         if self.path is not None:
             # If we have the value already, just return that
             return self.path
-        elif self.parent is None and self.backend == 'fs':
+        elif self.backend == 'fs':
             # This is the start node
             return os.path.abspath(self.name)
-        elif self.parent is None:
+        else:
             # This should theoretically never happen
-            warnings.warn(UnexpectedSituationWarning(
-                'get_path() was called on a non-filesystem backed Path with no parent'))
+            warnings.warn(
+                'get_path() was called on a non-filesystem backed Path with no parent',
+                UnexpectedSituationWarning)
             return self.name
-        else:
-            # Generate path from parent's path
-            return os.path.join(self.parent.get_path(), self.name)
+
+    def clear_path_cache(self) -> None:
+        """Forgets the path resolved by get_path(). This must be called when the name or parent changes."""
+        self._resolved_path = None
 
     def absorb(self, other: Path) -> None:
-        self.name = other.get_name()
-        self.parent = other.get_parent()
-        self.backend = other.get_path()
-        self.path_type = other.get_type()
-
-    def __eq__(self, other: Path) -> bool:
-        return all([
-            type(self) is type(other),
-            self.get_name() == other.get_name(),
-            self.get_parent() == other.get_parent(),
-            self.get_backend() == other.get_backend(),
-            self.get_type() == other.get_type()
-        ])
-
-
-class DirPath(Path, MutableMapping):
+        self.name = other.name
+        self.parent = other.parent
+        self.backend = other.backend
+        self.path_type = other.path_type
+        self.path = other.path
+        self._resolved_path = None
+
+    def __eq__(self, other: object) -> bool:
+        # Equal Paths in the same tree share their parent object, so comparing parents by identity
+        # gives the same result without recursing up the whole tree
+        return (isinstance(other, Path)
+                and type(self) is type(other)
+                and self.name == other.name
+                and self.backend == other.backend
+                and self.path_type == other.path_type
+                and self.parent is other.parent)
+
+
+class DirPath(Path):
     """Represents the common attributes and methods to represent a directory in the browser.
 
+    A DirPath can be used like a mapping of child names to child Paths. Each mapping method is
+    delegated straight to the children dict, rather than inherited from MutableMapping, whose
+    generic implementations are much slower.
+
     This class is meant to be extended by its subclasses, but can also be used by itself.
     """
 
+    __slots__ = ('children',)
+
     def __init__(self, name: str, parent: Optional[DirPath] = None, backend: str = 'fs', path_type: str = 'dir',
-                 children: Union[list[Path], dict[str, Path], Path, None] = None, context=None) -> None:
+                 children: Union[list[Path], dict[str, Path], Path, None] = None,
+                 context: Optional[list] = None) -> None:
         """Initializes a new DirPath object, optionally adding child Paths.
 
         :param name: inherited from Path
@@ -138,95 +196,111 @@ class DirPath(Path, MutableMapping):
         """
         if children is None:
             self.children = {}
-        elif type(children) is list:
-            self.children = {}
-            for item in children:
-                self.children[item.get_name()] = item
-        elif type(children) is dict:
+        elif isinstance(children, list):
+            self.children = {item.name: item for item in children}
+        elif isinstance(children, dict):
             self.children = children
         else:
-            self.children = {children.get_name(): children}
+            self.children = {children.name: children}
         super().__init__(name=name, parent=parent, backend=backend, path_type=path_type, context=context)
+        if context is None and self.children:
+            # A directory created above a known one takes its context from it. This is done right
+            # away, as the known directory will later look for its own context through this one.
+            self._context = next(iter(self.children.values())).context
         if self.name == '..' and self.children:
             self.name = os.path.basename(self.get_path())
 
     def set_context(self, context: Optional[list] = None) -> None:
-        if context is None and self.context is None:
-            if self.parent is not None:
-                self.context = self.parent.context
-            elif self.children:
-                self.context = list(self.values())[0].context
-        elif self.context is None:
-            self.context = context
-        else:
-            self.context[0] = context[0]
+        super().set_context(context)
+        if self.context is None and self.children:
+            self.context = next(iter(self.children.values())).context
 
-    def get_path(self) -> str:
+    def resolve_root_path(self) -> str:
         if self.path is not None:
             # If we have the value already, just return that
             return self.path
-        elif self.parent is None and not self.children:
+        elif not self.children:
             # This is the start node
             return os.path.abspath(self.name)
-        elif self.parent is not None:
-            # Generate path from parent's path
-            return os.path.join(self.parent.get_path(), self.name)
         else:
             # Generate path from first child Path
-            return os.path.dirname(list(self.values())[0].get_path())
+            return os.path.dirname(next(iter(self.children.values())).get_path())
+
+    def clear_path_cache(self) -> None:
+        """Forgets the resolved path of this directory and of the children whose paths depend on it."""
+        self._resolved_path = None
+        for child in self.children.values():
+            if child.path is None:
+                child.clear_path_cache()
 
-    def get_children(self) -> dict:
+    def get_children(self) -> dict[str, Path]:
         return self.children
 
-    def absorb(self, other: DirPath) -> None:
+    def absorb(self, other: Path) -> None:
         super().absorb(other)
-        self.children = other.get_children()
+        self.children = cast(DirPath, other).children
 
-    def __eq__(self, other: DirPath) -> bool:
-        return all([
-            super().__eq__(other),
-            self.children == other.get_children()
-        ])
+    def __eq__(self, other: object) -> bool:
+        # Children are compared by identity, for the same reason as parents are in Path.__eq__()
+        return (isinstance(other, DirPath)
+                and super().__eq__(other)
+                and self.children.keys() == other.children.keys()
+                and all(child is other.children[name] for name, child in self.children.items()))
 
-    def all(self) -> dict:
-        """Returns a dict containing all references including child, self, and parent.
+    def all(self) -> ChainMap:
+        """Returns a mapping containing all references including child, self, and parent.
 
-        :return: a dict containing all children, plus self and parent
+        The mapping is a view over the children dict rather than a copy, so it should not be
+        modified.
+
+        :return: a mapping containing all children, plus self and parent
         """
-        to_return = self.children.copy()
-        to_return.update({'.': self, '..': self.get_parent()})
-        return to_return
-
-    # ABC Mapping method implementations
-    def __getitem__(self, key: str) -> Path:
-        if key == '.':
-            return self
-        elif key == '..':
-            return self.get_parent()
-        else:
-            return self.children[key]
+        return ChainMap({'.': self, '..': self.parent}, self.children)
+
+    # Mapping method implementations
+    # Almost every key is a child's name, so '.' and '..' are only checked for after a first character test
+    def __getitem__(self, key: str) -> Optional[Path]:
+        if key and key[0] == '.' and (key == '.' or key == '..'):
+            return self if key == '.' else self.parent
+        return self.children[key]
 
     def __setitem__(self, key: str, value: Path) -> None:
-        if key == '.':
-            self.absorb(value)
-        elif key == '..':
-            self.set_parent(value)
+        if key and key[0] == '.' and (key == '.' or key == '..'):
+            if key == '.':
+                self.absorb(value)
+            else:
+                self.set_parent(cast(DirPath, value))
         else:
             self.children[key] = value
 
     def __delitem__(self, key: str) -> None:
         del self.children[key]
 
-    def __iter__(self) -> dict.keys:
+    def __iter__(self) -> Iterator[str]:
         return iter(self.children)
 
     def __len__(self) -> int:
         return len(self.children)
 
     # Additional Mapping method overrides to prevent '.' and '..' from causing problems
-    def __contains__(self, item: Path) -> bool:
+    def __contains__(self, item: str) -> bool:
         return item in self.children
 
+    def keys(self) -> KeysView[str]:
+        return self.children.keys()
+
+    def values(self) -> ValuesView[Path]:
+        return self.children.values()
+
+    def items(self) -> ItemsView[str, Path]:
+        return self.children.items()
+
+    def get(self, key: str, default: Optional[Path] = None) -> Optional[Path]:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
 
 class FilePath(Path):
     """Represents the common attributes and methods to represent a file in the browser.
@@ -238,6 +312,8 @@ class FilePath(Path):
     This class should not be used by itself, instead, use TextFile or BinaryFile.
     """
 
+    __slots__ = ()
+
     def open(self) -> None:
         """Opens the file this FilePath represents and prints its contents.
 
@@ -246,6 +322,12 @@ class FilePath(Path):
         with open(self.get_path()) as f:
             print(f.read())
 
+    def _v_open_stream(self, text: bool) -> IO:
+        """Opens this file through its virtual parent directory, as an IO/stream object."""
+        assert isinstance(self.parent, VirtualDirPath)
+        # With temp=False, v_open() returns an IO/stream object rather than a tempfile path
+        return cast(IO, self.parent.v_open(self.name, temp=False, text=text))
+
 
 class TextFile(FilePath):
     """Represents a generic text mode file in the browser.
@@ -258,6 +340,8 @@ class TextFile(FilePath):
     This class can be extended by its subclasses, but should also function just fine on its own.
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str, parent: Optional[DirPath] = None, backend: str = 'fs',
                  path_type: str = 'text') -> None:
         """Initializes a new TextFile object.
@@ -276,20 +360,23 @@ class TextFile(FilePath):
 
     def open(self) -> None:
         if self.backend == 'fs':
-            with self.c_open() as f:
+            # The mode is fixed here, so there's no need to go through c_open()
+            with open(self.get_path(), 'r') as f:
                 print(f.read())
         else:
-            print(self.get_parent().v_open(self.get_name(), temp=False, text=True).read())
+            print(self._v_open_stream(text=True).read())
 
     def c_open(self, mode: str = 'r') -> PathContextManager:
         if self.backend == 'fs':
+            # The mode only needs correcting, and the warning machinery only runs, when 'b' is given
             if 'b' in mode:
-                warnings.warn(IncorrectFileTypeWarning(
-                    'Binary mode access of a text mode file is not allowed. Correcting.'))
-            mode = mode.replace('b', '')
+                warnings.warn(
+                    'Binary mode access of a text mode file is not allowed. Correcting.',
+                    IncorrectFileTypeWarning)
+                mode = mode.replace('b', '')
             return PathContextManager(self.get_path(), mode)
         else:
-            return PathContextManager(self.get_parent().v_open(self.get_name(), temp=False, text=True).read())
+            return PathContextManager(self._v_open_stream(text=True))
 
 
 class BinaryFile(FilePath):
@@ -303,6 +390,8 @@ class BinaryFile(FilePath):
     This class can be extended by its subclasses, but should also function just fine on its own.
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str, parent: Optional[DirPath] = None, backend: str = 'fs',
                  path_type: str = 'binary') -> None:
         """Initializes a new BinaryFile object.
@@ -321,10 +410,10 @@ class BinaryFile(FilePath):
 
     def open(self) -> None:
         if self.backend == 'fs':
-            with self.c_open() as f:
+            with open(self.get_path(), 'rb') as f:
                 print(f.read())
         else:
-            print(self.get_parent().v_open(self.get_name(), temp=False, text=False).read())
+            print(self._v_open_stream(text=False).read())
 
     def c_open(self, mode: str = 'r') -> PathContextManager:
         """Handles using this BinaryFile as a context manager.
@@ -337,28 +426,34 @@ class BinaryFile(FilePath):
                 mode += 'b'
             return PathContextManager(self.get_path(), mode)
         else:
-            return PathContextManager(self.get_parent().v_open(self.get_name(), temp=False, text=False))
+            return PathContextManager(self._v_open_stream(text=False))
 
 
 class PathContextManager:
     """This is a context manager which should only be constructed and managed by FilePath objects."""
-    def __init__(self, path, mode='r'):
+
+    __slots__ = ('path', 'mode', 'file', '_is_fs')
+
+    def __init__(self, path: Union[str, IO], mode: str = 'r') -> None:
         self.path = path
         self.mode = mode
+        self.file: Optional[IO] = None
+        # A str is a filesystem path to open, anything else is an already open IO object
+        self._is_fs = isinstance(path, str)
 
-    def __enter__(self):
-        if type(self.path) is str:
-            self.file = open(self.path, self.mode)
+    def __enter__(self) -> IO:
+        if self._is_fs:
+            self.file = open(cast(str, self.path), self.mode)
             return self.file
         else:
-            return self.path
+            return cast(IO, self.path)
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if type(self.path) is str:
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._is_fs:
             if self.file:
                 self.file.close()
         else:
-            self.path.seek(0)
+            cast(IO, self.path).seek(0)
 
 
 class VirtualDirPath(DirPath):
@@ -401,7 +496,7 @@ class VirtualDirPath(DirPath):
         """
         pass
 
-    def v_open(self, path: str, temp: bool = False, text: bool = False) -> Union[str, IO]:
+    def v_open(self, path: str, temp: bool = False, text: bool = False) -> Optional[Union[str, IO]]:
         """This method should open a child Path and return accessors.
 
         This method will be called by child FilePath objects in order to access the file they